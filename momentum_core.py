@@ -0,0 +1,374 @@
+"""
+Data fetching and numeric helpers shared by the Momentum Timer pages.
+
+Keeping them in one module means every page shares a single st.cache_data
+cache and a single compiled copy of the numba kernels.
+"""
+import datetime
+import hashlib
+import os
+import pathlib
+import re
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+import yfinance as yf
+from numba import njit
+
+# Number of tickers per yf.download call when a long ticker list is split into
+# batches for concurrent download
+DOWNLOAD_BATCH_SIZE = 20
+# Number of batches to download concurrently when the ticker list exceeds one batch
+MAX_DOWNLOAD_WORKERS = 4
+# Directory where downloaded prices are kept between app restarts. It sits next to
+# this module rather than in the working directory, so it is never a shared
+# directory such as ~/.cache
+CACHE_DIR = pathlib.Path(__file__).resolve().parent / ".cache" / "prices"
+# Names of the files this module writes to CACHE_DIR: a dated cache file, or a
+# temporary file for one while it is being written
+CACHE_FILE_PATTERN = re.compile(r"(\d{4}-\d{2}-\d{2})-[0-9a-f]{40}\.parquet(?:\.[a-z0-9_]+\.tmp)?")
+# Maximum number of rows sent to the browser for a line chart
+MAX_CHART_POINTS = 500
+
+
+class PriceDataError(Exception):
+    """Raised when no usable price data could be downloaded for the requested tickers."""
+
+
+def download_close_prices(tickers, period, threads=True):
+    """
+    Downloads the 'Close' prices for one batch of tickers with a single yf.download call.
+
+    Args:
+        tickers (list): A list of at most DOWNLOAD_BATCH_SIZE ticker symbols.
+        period (str): The time period for historical data (e.g., '1y', '6mo').
+        threads (bool): Whether yfinance downloads the batch's symbols on its own
+                        threads; disabled when batches already run concurrently.
+
+    Returns:
+        pandas.DataFrame: A DataFrame with one 'Close' column per ticker.
+    """
+    # With auto_adjust=True the 'Close' price is already adjusted for dividends and
+    # splits, so no 'Adj Close' column is needed; actions=False skips the
+    # dividend/split columns. Both are passed explicitly so older yfinance
+    # versions, which defaulted to auto_adjust=False, fetch the same data.
+    data = yf.download(tickers, period=period, auto_adjust=True, actions=False, threads=threads, progress=False)
+
+    # Check if the returned DataFrame has a MultiIndex (for multiple tickers)
+    if isinstance(data.columns, pd.MultiIndex):
+        # If so, select the 'Close' column for all tickers
+        return data['Close']
+
+    # If not, it's a single ticker, so we access 'Close' directly and name
+    # the column after the ticker so batches can be joined side by side
+    return data['Close'].to_frame(name=tickers[0])
+
+
+def disk_cache_path(tickers, period):
+    """
+    Builds the on-disk cache file path for a set of tickers and a period.
+
+    The file name starts with the current date, so cached prices are refetched
+    once per day and files from earlier days can be recognized and pruned.
+
+    Args:
+        tickers (tuple): A tuple of stock ticker symbols.
+        period (str): The time period for historical data (e.g., '1y', '6mo').
+
+    Returns:
+        pathlib.Path: The Parquet file the prices are stored in.
+    """
+    key = ",".join(sorted(tickers)) + "|" + period
+    return CACHE_DIR / f"{datetime.date.today().isoformat()}-{hashlib.sha1(key.encode()).hexdigest()}.parquet"
+
+
+def prune_disk_cache():
+    """
+    Deletes cache files, including leftover temporary files, from earlier days.
+
+    Only names matching CACHE_FILE_PATTERN are touched, so anything else in
+    CACHE_DIR is left alone.
+    """
+    today = datetime.date.today().isoformat()
+    for path in CACHE_DIR.iterdir():
+        match = CACHE_FILE_PATTERN.fullmatch(path.name)
+        if match and match.group(1) != today:
+            path.unlink(missing_ok=True)
+
+
+def read_disk_cache(cache_path):
+    """
+    Reads cached prices from disk, discarding the file if it can't be read.
+
+    Args:
+        cache_path (pathlib.Path): The Parquet file to read.
+
+    Returns:
+        pandas.DataFrame: The cached prices, or None if there is no usable file.
+    """
+    if not cache_path.exists():
+        return None
+    try:
+        return pd.read_parquet(cache_path)
+    except (OSError, ValueError):
+        # A corrupt or truncated file would fail on every run until the date
+        # changes, so remove it and let the caller download the data again
+        cache_path.unlink(missing_ok=True)
+        return None
+
+
+def write_disk_cache(data, cache_path):
+    """
+    Writes prices to the disk cache atomically, ignoring failures.
+
+    The data is written to a temporary file in CACHE_DIR and then moved onto
+    `cache_path`, so an interrupted write never leaves a partial Parquet file
+    behind. Files from earlier days are pruned first, so the directory only
+    ever holds today's downloads. Caching is best effort: if the directory
+    isn't writable the download is still returned to the caller.
+
+    Args:
+        data (pandas.DataFrame): The prices to store.
+        cache_path (pathlib.Path): The Parquet file to write.
+    """
+    temp_path = None
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        prune_disk_cache()
+        # Named after the cache file it becomes, so a stray temporary file is pruned too
+        prefix = f"{cache_path.name}."
+        with tempfile.NamedTemporaryFile(dir=CACHE_DIR, prefix=prefix, suffix=".tmp", delete=False) as temp_file:
+            temp_path = temp_file.name
+        data.to_parquet(temp_path)
+        os.replace(temp_path, cache_path)
+    except OSError:
+        if temp_path is not None:
+            pathlib.Path(temp_path).unlink(missing_ok=True)
+
+
+@st.cache_data(ttl=900, show_spinner=False)
+def get_momentum_data(tickers, period):
+    """
+    Fetches historical stock data for a list of tickers, handling potential errors.
+
+    Prices are downloaded from Yahoo Finance at most once per day for each set
+    of tickers and period: successful downloads are written to a Parquet file
+    under CACHE_DIR, and that file is reused for the rest of the day, across
+    Streamlit restarts. The in-memory cache in front of it expires after 15
+    minutes, but then the same file is read back rather than downloaded again,
+    so intraday the data stays as of the first fetch, including a partial bar
+    for the current session.
+    Long ticker lists are split into batches of DOWNLOAD_BATCH_SIZE, which
+    are downloaded concurrently on a small thread pool.
+
+    Args:
+        tickers (tuple): A tuple of stock ticker symbols (hashable, for the cache key).
+        period (str): The time period for historical data (e.g., '1y', '6mo').
+
+    Returns:
+        pandas.DataFrame: A float32 DataFrame containing the 'Close' prices for all tickers.
+
+    Raises:
+        PriceDataError: If the data couldn't be fetched. Raising rather than returning
+                        an empty DataFrame keeps st.cache_data from memoizing the
+                        failure, so the next run tries the download again.
+    """
+    cache_path = disk_cache_path(tickers, period)
+    cached = read_disk_cache(cache_path)
+    if cached is not None:
+        return cached
+
+    tickers = list(tickers)
+    chunks = [tickers[i:i + DOWNLOAD_BATCH_SIZE] for i in range(0, len(tickers), DOWNLOAD_BATCH_SIZE)]
+
+    try:
+        if len(chunks) == 1:
+            data = download_close_prices(chunks[0], period)
+        else:
+            # The downloads are network-bound, so threads overlap the round trips. Each
+            # batch is fetched without yfinance's own per-symbol threads, so at most
+            # MAX_DOWNLOAD_WORKERS requests to Yahoo are in flight at once
+            with ThreadPoolExecutor(max_workers=min(MAX_DOWNLOAD_WORKERS, len(chunks))) as executor:
+                data = pd.concat(
+                    executor.map(lambda chunk: download_close_prices(chunk, period, threads=False), chunks),
+                    axis=1,
+                )
+
+        # Drop any rows with NaN values that might have been caused by missing data
+        data.dropna(inplace=True)
+
+    except (KeyError, IndexError) as e:
+        # Handle cases where the 'Close' column is missing or data is not found.
+        # This will happen if yfinance couldn't find data for a ticker.
+        raise PriceDataError(e) from e
+
+    if data.empty:
+        # Also happens when a transient network error leaves every row incomplete
+        raise PriceDataError("No complete price history was returned.")
+
+    # float32 holds prices to ~7 significant digits, plenty for momentum and
+    # volatility, and halves the memory every later computation has to read
+    data = data.astype(np.float32, copy=False)
+
+    write_disk_cache(data, cache_path)
+    return data
+
+
+@njit(cache=True, fastmath=True)
+def _annualized_volatility(series):
+    """
+    Computes the annualized volatility of one ticker's daily log returns in a single pass.
+
+    Uses Welford's online algorithm, so the returns are never stored and the
+    float64 running mean/variance stay stable over long histories.
+
+    Args:
+        series (numpy.ndarray): Contiguous float32 closing prices for one ticker.
+
+    Returns:
+        float: The sample standard deviation (ddof=1) annualized over 252 trading days.
+    """
+    count = 0
+    mean = 0.0
+    sum_sq_diff = 0.0
+    for i in range(1, len(series)):
+        log_return = np.log(series[i] / series[i - 1])
+        count += 1
+        delta = log_return - mean
+        mean += delta / count
+        sum_sq_diff += delta * (log_return - mean)
+
+    return np.sqrt(sum_sq_diff / (count - 1) * 252.0)
+
+
+@njit(cache=True, fastmath=True)
+def _momentum_volatility_kernel(prices, lookback):
+    """
+    Computes momentum and annualized log-return volatility for every ticker in one pass.
+
+    Args:
+        prices (numpy.ndarray): Contiguous float32 closing prices in ticker-major
+                                layout, shape (tickers, days).
+        lookback (int): The number of trading days to measure momentum over.
+
+    Returns:
+        tuple: Two float32 arrays holding the momentum and volatility per ticker.
+    """
+    n_tickers = prices.shape[0]
+    momentum = np.empty(n_tickers, np.float32)
+    volatility = np.empty(n_tickers, np.float32)
+
+    for j in range(n_tickers):
+        # Each ticker's history is one contiguous row, so the inner loop reads memory in order
+        series = prices[j]
+        momentum[j] = series[-1] / series[-1 - lookback] - 1.0
+        volatility[j] = _annualized_volatility(series)
+
+    return momentum, volatility
+
+
+def momentum_and_volatility(data, lookback):
+    """
+    Calculates the latest momentum and the annualized volatility for every ticker.
+
+    Both are computed by a single compiled kernel, so no intermediate return
+    DataFrames are built and the per-call pandas overhead stays constant no
+    matter how many tickers are entered.
+
+    Args:
+        data (pandas.DataFrame): Closing prices, one column per ticker; needs more
+                                 than `lookback` rows.
+        lookback (int): The number of trading days to measure momentum over.
+
+    Returns:
+        tuple: A pandas.Series of momentum scores (strongest first) and a
+               pandas.Series of annualized volatility (most volatile first).
+    """
+    # Transpose to ticker-major order so each ticker is reduced over contiguous memory
+    prices = np.ascontiguousarray(data.to_numpy(dtype=np.float32).T)
+    momentum, volatility = _momentum_volatility_kernel(prices, lookback)
+    return (
+        pd.Series(momentum, index=data.columns).sort_values(ascending=False),
+        pd.Series(volatility, index=data.columns).sort_values(ascending=False),
+    )
+
+
+@st.cache_data(ttl=900, show_spinner=False)
+def compute_rankings(tickers, period, lookback):
+    """
+    Ranks tickers by momentum and volatility, memoized on the inputs that define the prices.
+
+    The cache key is the (tickers, period, lookback) triple rather than the price
+    DataFrame, so revisiting a slider position skips hashing the prices as well as
+    the computation itself.
+
+    Args:
+        tickers (tuple): A tuple of stock ticker symbols.
+        period (str): The time period for historical data (e.g., '1y', '6mo').
+        lookback (int): The number of trading days to measure momentum over; the
+                        prices for `period` need more than this many rows.
+
+    Returns:
+        tuple: The momentum and volatility Series from momentum_and_volatility().
+    """
+    return momentum_and_volatility(get_momentum_data(tickers, period), lookback)
+
+
+def downsample(data, max_points=MAX_CHART_POINTS):
+    """
+    Thins a time series to at most `max_points` evenly spaced rows for charting.
+
+    The first and last rows are always kept, so the chart still spans the full period
+    while far less data is serialized to the browser on every rerun.
+
+    Args:
+        data (pandas.DataFrame): The rows to chart, in time order.
+        max_points (int): The maximum number of rows to keep.
+
+    Returns:
+        pandas.DataFrame: `data` itself if it is short enough, otherwise a subset of its rows.
+    """
+    if len(data) <= max_points:
+        return data
+    return data.iloc[np.linspace(0, len(data) - 1, max_points).astype(int)]
+
+
+def history_period(months):
+    """
+    Builds the yfinance period string to download for a momentum lookback.
+
+    Args:
+        months (int): The number of months for the momentum calculation.
+
+    Returns:
+        str: A period string such as '24mo'.
+    """
+    # Use a slightly longer period to ensure enough data
+    return f"{months * 4}mo"
+
+
+def prefetch_momentum_data(tickers, periods):
+    """
+    Warms the get_momentum_data cache for several periods on a background thread.
+
+    The thread has no Streamlit script context, so it must not report errors
+    itself. Failed downloads raise instead of being cached, and are simply
+    skipped here; the Run button retries them and shows the error.
+
+    Args:
+        tickers (tuple): A tuple of stock ticker symbols.
+        periods (list): The period strings to download ahead of time.
+    """
+    def fetch_all():
+        for period in periods:
+            try:
+                get_momentum_data(tickers, period)
+            except Exception:
+                # Best effort only: a failure here leaves nothing in the cache
+                continue
+
+    threading.Thread(target=fetch_all, daemon=True).start()
@@ -1,9 +1,16 @@
 import streamlit as st
-import yfinance as yf
-import pandas as pd
-import datetime
-import math
-import numpy as np
+
+from momentum_core import (
+    PriceDataError,
+    compute_rankings,
+    downsample,
+    get_momentum_data,
+    history_period,
+    prefetch_momentum_data,
+)
+
+# Tickers pre-filled in the input box
+DEFAULT_TICKERS = ("AAPL", "GOOG", "MSFT", "TSLA")
 
 # Set the title and a short description for the app
 st.title("Momentum Timer")
@@ -25,45 +32,18 @@ st.markdown(
     """
 )
 
-def get_momentum_data(tickers, period, progress_bar):
+def display_percentage_table(series, column_name):
     """
-    Fetches historical stock data for a list of tickers, handling potential errors.
+    Displays a ranked Series as a single-column table formatted as percentages.
 
-    Args:
-        tickers (list): A list of stock ticker symbols.
-        period (str): The time period for historical data (e.g., '1y', '6mo').
-        progress_bar: A Streamlit progress bar object for visual feedback.
+    The Series is styled directly as a one-column frame, without building and
+    re-indexing a separate DataFrame.
 
-    Returns:
-        pandas.DataFrame: A DataFrame containing the 'Close' prices for all tickers,
-                          or an empty DataFrame if data fetching fails.
+    Args:
+        series (pandas.Series): Fractional values indexed by ticker.
+        column_name (str): The column header to show.
     """
-    try:
-        # Download data for the list of tickers.
-        # The new default auto_adjust=True means we will use the 'Close' price,
-        # which is already adjusted for dividends and splits.
-        data = yf.download(tickers, period=period, progress=False)
-
-        # Check if the returned DataFrame has a MultiIndex (for multiple tickers)
-        if isinstance(data.columns, pd.MultiIndex):
-            # If so, select the 'Close' column for all tickers
-            data = data['Close']
-        else:
-            # If not, it's a single ticker, so we access 'Close' directly
-            # This is a fallback for when the multi-ticker download fails
-            data = data['Close']
-            data = pd.DataFrame(data)
-            
-        # Drop any rows with NaN values that might have been caused by missing data
-        data.dropna(inplace=True)
-
-    except (KeyError, IndexError) as e:
-        # Handle cases where the 'Close' column is missing or data is not found.
-        # This will happen if yfinance couldn't find data for a ticker.
-        st.error(f"Error fetching data for one or more tickers. The data might not be available. Details: {e}")
-        return pd.DataFrame()
-
-    return data
+    st.dataframe(series.to_frame(name=column_name).style.format("{:.2%}"), use_container_width=True)
 
 
 # --- Streamlit UI Components ---
@@ -73,24 +53,32 @@ st.header("Configuration")
 months_momentum = st.slider("Number of months for momentum calculation:", min_value=1, max_value=12, value=6, step=1)
 
 # User input for the list of tickers
-ticker_string = st.text_area("Enter stock tickers (e.g., AAPL, GOOG, MSFT, TSLA):", "AAPL, GOOG, MSFT, TSLA")
+ticker_string = st.text_area("Enter stock tickers (e.g., AAPL, GOOG, MSFT, TSLA):", ", ".join(DEFAULT_TICKERS))
 
 # Check if the ticker input is empty
 if ticker_string:
-    # Convert the input string into a list of tickers
-    tickers_list = [t.strip().upper() for t in ticker_string.split(',')]
+    # Convert the input string into a sorted tuple of unique tickers, skipping blanks,
+    # so equivalent inputs ("msft, AAPL," vs "AAPL, MSFT") share one cached download.
+    # The tuple is hashable, so it is passed to the cached functions as-is.
+    tickers = tuple(sorted({t.strip().upper() for t in ticker_string.split(',') if t.strip()}))
 else:
     st.warning("Please enter at least one stock ticker symbol.")
-    tickers_list = []
+    tickers = ()
+
+# On the first render of a session, prefetch the selected period and its neighbours
+# in the background, so the first analysis usually starts from a cache hit
+if tickers and not st.session_state.get("prefetch_started"):
+    st.session_state["prefetch_started"] = True
+    nearby_months = [m for m in (months_momentum, months_momentum + 1, months_momentum - 1) if 1 <= m <= 12]
+    prefetch_momentum_data(tickers, [history_period(m) for m in nearby_months])
 
 # Button to trigger the analysis
 if st.button("Run Momentum Analysis"):
-    if not tickers_list:
+    if not tickers:
         st.warning("Please enter valid ticker symbols before running the analysis.")
     else:
         # Calculate the period string for yfinance
-        # Use a slightly longer period to ensure enough data
-        period_str = f"{months_momentum * 4}mo"
+        period_str = history_period(months_momentum)
 
         # Use a progress bar for visual feedback
         progress_bar = st.progress(0)
@@ -98,30 +86,27 @@ if st.button("Run Momentum Analysis"):
 
         # Get the historical data
         with st.spinner("Fetching data..."):
-            historical_data = get_momentum_data(tickers_list, period_str, progress_bar)
+            try:
+                historical_data = get_momentum_data(tickers, period_str)
+            except PriceDataError as e:
+                st.error(f"Error fetching data for one or more tickers. The data might not be available. Details: {e}")
+                historical_data = None
         
         progress_bar.progress(50)
 
-        if not historical_data.empty:
+        if historical_data is not None:
             # --- Momentum Analysis Section ---
             days_in_period = months_momentum * 21  # Approx 21 trading days per month
             
-            if len(historical_data) >= days_in_period:
-                momentum_data = historical_data.pct_change(days_in_period).iloc[-1].sort_values(ascending=False)
+            if len(historical_data) > days_in_period:
+                momentum_data, volatility = compute_rankings(tickers, period_str, days_in_period)
                 
                 st.subheader(f"Momentum Scores (Last {months_momentum} Months)")
-                momentum_df = momentum_data.to_frame(name="Momentum Score")
-                st.dataframe(momentum_df.style.format({"Momentum Score": "{:.2%}"}), use_container_width=True)
+                display_percentage_table(momentum_data, "Momentum Score")
 
                 # --- Risk Analysis (Volatility) Section ---
                 st.subheader("Risk Analysis (Volatility)")
-                daily_returns = historical_data.pct_change()
-                # Annualize the daily volatility by multiplying by the square root of 252 trading days
-                volatility = daily_returns.std() * np.sqrt(252)
-                volatility = volatility.sort_values(ascending=False)
-
-                volatility_df = volatility.to_frame(name="Annualized Volatility")
-                st.dataframe(volatility_df.style.format({"Annualized Volatility": "{:.2%}"}), use_container_width=True)
+                display_percentage_table(volatility, "Annualized Volatility")
                 
                 # --- Trading Signal and Recommendation ---
                 st.subheader("Trading Signal")
@@ -130,7 +115,7 @@ if st.button("Run Momentum Analysis"):
                 top_performers = momentum_data.head(num_tickers_to_chart)
                 
                 st.subheader(f"Top {num_tickers_to_chart} Performers Chart")
-                st.line_chart(historical_data[top_performers.index])
+                st.line_chart(downsample(historical_data[top_performers.index]))
 
                 st.success(
                     f"Based on the last {months_momentum} months, the top performing stocks are: "
@@ -0,0 +1,43 @@
+import datetime
+import hashlib
+
+import momentum_core
+
+
+def _cache_name(day, key):
+    return f"{day.isoformat()}-{hashlib.sha1(key.encode()).hexdigest()}.parquet"
+
+
+def test_prune_disk_cache_only_removes_stale_cache_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(momentum_core, "CACHE_DIR", tmp_path)
+    today = datetime.date.today()
+    yesterday = today - datetime.timedelta(days=1)
+
+    stale = tmp_path / _cache_name(yesterday, "AAPL|4mo")
+    stale_temp = tmp_path / f"{stale.name}.abc123_x.tmp"
+    fresh = tmp_path / _cache_name(today, "AAPL|4mo")
+    fresh_temp = tmp_path / f"{fresh.name}.abc123_x.tmp"
+    unrelated = [
+        tmp_path / "other-app-index.parquet",
+        tmp_path / "session.tmp",
+        tmp_path / f"{stale.name}.bak",
+    ]
+    for path in [stale, stale_temp, fresh, fresh_temp, *unrelated]:
+        path.write_bytes(b"data")
+
+    momentum_core.prune_disk_cache()
+
+    assert not stale.exists()
+    assert not stale_temp.exists()
+    assert fresh.exists()
+    assert fresh_temp.exists()
+    assert all(path.exists() for path in unrelated)
+
+
+def test_disk_cache_path_matches_prune_pattern(tmp_path, monkeypatch):
+    monkeypatch.setattr(momentum_core, "CACHE_DIR", tmp_path)
+
+    path = momentum_core.disk_cache_path(("MSFT", "AAPL"), "24mo")
+
+    assert path.parent == tmp_path
+    assert momentum_core.CACHE_FILE_PATTERN.fullmatch(path.name)